@@ -9,12 +9,15 @@ from datetime import datetime
 
 from services.vector_service import VectorService
 from services.document_service import DocumentService
+from services.migration_service import MigrationService
 from models.schemas import (
     DocumentResponse, 
     SearchRequest, 
     SearchResponse,
     EmbeddingRequest,
-    EmbeddingResponse
+    EmbeddingResponse,
+    MigrationRequest,
+    MigrationStatus
 )
 
 # Configure logging
@@ -39,6 +42,7 @@ app.add_middleware(
 # Initialize services
 vector_service = VectorService()
 document_service = DocumentService()
+migration_service = MigrationService(vector_service)
 
 @app.on_event("startup")
 async def startup_event():
@@ -90,11 +94,15 @@ async def upload_document(
         # Process the document
         document_data = await document_service.process_document(file, user_id)
         
+        # Stored with the document-level vector used for coarse-to-fine search
+        summary = await document_service.get_document_summary(document_data["content"])
+        
         # Create embeddings and store in Qdrant
         embedding_result = await vector_service.create_document_embeddings(
             document_data["chunks"],
             document_data["document_id"],
-            user_id
+            user_id,
+            summary=summary
         )
         
         return DocumentResponse(
@@ -109,6 +117,17 @@ async def upload_document(
         logger.error(f"Error uploading document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/documents/backfill")
+async def backfill_document_vectors():
+    """Add document-level vectors to documents uploaded before they were stored"""
+    try:
+        backfilled = await vector_service.backfill_document_vectors()
+        return {"documents_backfilled": backfilled}
+        
+    except Exception as e:
+        logger.error(f"Error backfilling document vectors: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/search", response_model=SearchResponse)
 async def search_documents(request: SearchRequest):
     """Search documents using vector similarity"""
@@ -117,7 +136,12 @@ async def search_documents(request: SearchRequest):
             query=request.query,
             user_id=request.user_id,
             limit=request.limit,
-            score_threshold=request.score_threshold
+            score_threshold=request.score_threshold,
+            neighbor_window=request.neighbor_window,
+            diversify=request.diversify,
+            mmr_lambda=request.mmr_lambda,
+            duplicate_threshold=request.duplicate_threshold,
+            top_documents=request.top_documents if request.hierarchical else None
         )
         
         return SearchResponse(
@@ -146,6 +170,42 @@ async def create_embeddings(request: EmbeddingRequest):
         logger.error(f"Error creating embeddings: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/migrations", response_model=MigrationStatus)
+async def start_migration(request: MigrationRequest):
+    """Start re-embedding all documents with a new model in the background"""
+    try:
+        status = await migration_service.start_migration(
+            target_model=request.target_model,
+            target_collection=request.target_collection,
+            page_size=request.page_size,
+            batch_size=request.batch_size
+        )
+        return MigrationStatus(**status)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting migration: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/migrations/status", response_model=MigrationStatus)
+async def get_migration_status():
+    """Progress and throughput of the current or last migration"""
+    return MigrationStatus(**migration_service.get_status())
+
+@app.delete("/migrations", response_model=MigrationStatus)
+async def cancel_migration():
+    """Cancel the running migration and keep searching the current collection"""
+    try:
+        status = await migration_service.cancel_migration()
+        return MigrationStatus(**status)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error cancelling migration: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.delete("/documents/{document_id}")
 async def delete_document(document_id: str, user_id: str):
     """Delete a document and its embeddings"""
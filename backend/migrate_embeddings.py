@@ -0,0 +1,73 @@
+"""Start an embedding model migration on a running API and follow its progress.
+
+Usage:
+    python migrate_embeddings.py all-mpnet-base-v2
+    python migrate_embeddings.py all-mpnet-base-v2 --batch-size 512 --page-size 2000
+    python migrate_embeddings.py --status
+    python migrate_embeddings.py --cancel
+"""
+import argparse
+import os
+import sys
+import time
+
+import httpx
+
+def print_status(status: dict):
+    progress = status.get("progress", 0.0) * 100
+    eta = status.get("eta_seconds")
+    eta_text = f", eta {eta:.0f}s" if eta is not None else ""
+    print(
+        f"[{status['state']}] {status.get('processed_points', 0)}/{status.get('total_points', 0)} points "
+        f"({progress:.1f}%, {status.get('points_per_second', 0.0):.1f} points/s{eta_text})"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed all documents with a new model without downtime")
+    parser.add_argument("target_model", nargs="?", help="Sentence Transformers model to migrate to")
+    parser.add_argument("--target-collection", help="Collection to migrate into")
+    parser.add_argument("--page-size", type=int, help="Points read per scroll page")
+    parser.add_argument("--batch-size", type=int, help="Texts encoded per embedding batch")
+    parser.add_argument("--api-url", default=os.getenv("API_URL", "http://localhost:8000"))
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--status", action="store_true", help="Show the current migration status and exit")
+    parser.add_argument("--cancel", action="store_true", help="Cancel the running migration and exit")
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.api_url, timeout=300) as client:
+        if args.cancel:
+            response = client.delete("/migrations")
+        elif args.status:
+            response = client.get("/migrations/status")
+        else:
+            if not args.target_model:
+                parser.error("target_model is required to start a migration")
+            response = client.post("/migrations", json={
+                "target_model": args.target_model,
+                "target_collection": args.target_collection,
+                "page_size": args.page_size,
+                "batch_size": args.batch_size
+            })
+
+        if response.status_code != 200:
+            print(f"Error: {response.json().get('detail', response.text)}", file=sys.stderr)
+            sys.exit(1)
+
+        status = response.json()
+        print_status(status)
+        if args.cancel or args.status:
+            return
+
+        while status["state"] == "running":
+            time.sleep(args.poll_interval)
+            status = client.get("/migrations/status").json()
+            print_status(status)
+
+        if status["state"] != "completed":
+            print(f"Migration {status['state']}: {status.get('error')}", file=sys.stderr)
+            sys.exit(1)
+
+        print(f"Search now uses '{status['target_collection']}' with model {status['target_model']}.")
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,12 @@ class SearchRequest(BaseModel):
     user_id: str = Field(..., description="User ID for filtering results")
     limit: int = Field(default=10, ge=1, le=100, description="Maximum number of results")
     score_threshold: float = Field(default=0.7, ge=0.0, le=1.0, description="Minimum similarity score")
+    neighbor_window: int = Field(default=0, ge=0, le=5, description="Number of adjacent chunks on each side to merge into every result")
+    diversify: bool = Field(default=False, description="Re-rank over-fetched candidates with MMR and drop near-duplicates")
+    mmr_lambda: float = Field(default=0.7, ge=0.0, le=1.0, description="Relevance vs. diversity trade-off for MMR (1.0 = relevance only)")
+    duplicate_threshold: float = Field(default=0.95, ge=0.0, le=1.0, description="Cosine similarity above which a candidate counts as a near-duplicate")
+    hierarchical: bool = Field(default=False, description="Select the best matching documents first, then search only their chunks")
+    top_documents: int = Field(default=5, ge=1, le=100, description="Number of documents searched in hierarchical mode")
 
 class SearchResult(BaseModel):
     document_id: str
@@ -35,6 +41,29 @@ class EmbeddingResponse(BaseModel):
     model_name: str
     dimension: int
 
+class MigrationRequest(BaseModel):
+    target_model: str = Field(..., description="Sentence Transformers model to re-embed documents with")
+    target_collection: Optional[str] = Field(default=None, description="Collection to migrate into, derived from the model name if omitted")
+    page_size: Optional[int] = Field(default=None, ge=1, le=10000, description="Points read per scroll page")
+    batch_size: Optional[int] = Field(default=None, ge=1, le=4096, description="Texts encoded per embedding batch")
+
+class MigrationStatus(BaseModel):
+    state: str
+    source_collection: Optional[str] = None
+    target_collection: Optional[str] = None
+    source_model: Optional[str] = None
+    target_model: Optional[str] = None
+    total_points: int = 0
+    processed_points: int = 0
+    skipped_points: int = 0
+    progress: float = 0.0
+    points_per_second: float = 0.0
+    elapsed_seconds: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+
 class DocumentChunk(BaseModel):
     chunk_id: str
     content: str
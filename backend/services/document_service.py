@@ -163,6 +163,7 @@ class DocumentService:
             current_chunk = []
             current_length = 0
             chunk_index = 0
+            overlap_count = 0  # Leading words the current chunk repeats from the previous one
             
             for word in words:
                 word_length = len(word) + 1  # +1 for space
@@ -176,7 +177,8 @@ class DocumentService:
                         chunk_index=chunk_index,
                         metadata={
                             "char_count": len(chunk_content),
-                            "word_count": len(current_chunk)
+                            "word_count": len(current_chunk),
+                            "overlap_words": overlap_count
                         }
                     )
                     chunks.append(chunk)
@@ -184,6 +186,7 @@ class DocumentService:
                     # Start new chunk with overlap
                     overlap_words = current_chunk[-self.chunk_overlap//5:] if len(current_chunk) > self.chunk_overlap//5 else []
                     current_chunk = overlap_words + [word]
+                    overlap_count = len(overlap_words)
                     current_length = sum(len(w) + 1 for w in current_chunk)
                     chunk_index += 1
                 else:
@@ -199,7 +202,8 @@ class DocumentService:
                     chunk_index=chunk_index,
                     metadata={
                         "char_count": len(chunk_content),
-                        "word_count": len(current_chunk)
+                        "word_count": len(current_chunk),
+                        "overlap_words": overlap_count
                     }
                 )
                 chunks.append(chunk)
@@ -0,0 +1,253 @@
+import os
+import re
+import time
+import asyncio
+from typing import Dict, Any, Optional, Tuple
+import logging
+from datetime import datetime
+
+from qdrant_client.http.models import PointStruct
+from sentence_transformers import SentenceTransformer
+
+from services.vector_service import VectorService, DOCUMENT_SUMMARY_POINT
+
+logger = logging.getLogger(__name__)
+
+class MigrationService:
+    """Re-embeds the active collection with a new model in the background"""
+
+    def __init__(self, vector_service: VectorService):
+        self.vector_service = vector_service
+        self.scroll_page_size = int(os.getenv("MIGRATION_SCROLL_PAGE_SIZE", "1000"))
+        self.embed_batch_size = int(os.getenv("MIGRATION_EMBED_BATCH_SIZE", "256"))
+
+        self._task: Optional[asyncio.Task] = None
+        # Set while start_migration awaits, before the task exists
+        self._starting = False
+        self._status: Dict[str, Any] = {"state": "idle"}
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _collection_name_for(self, model_name: str) -> str:
+        """Derive a collection name from the base collection and model name"""
+        model_slug = re.sub(r"[^A-Za-z0-9_-]+", "-", model_name).strip("-").lower()
+        return f"{self.vector_service.base_collection_name}__{model_slug}"
+
+    async def start_migration(
+        self,
+        target_model: str,
+        target_collection: Optional[str] = None,
+        page_size: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Prepare the target collection, enable dual writes and start the background job"""
+        if self._starting or self.is_running():
+            raise ValueError("A migration is already running")
+
+        source_collection = self.vector_service.collection_name
+        target_collection = target_collection or self._collection_name_for(target_model)
+        if target_collection == source_collection:
+            raise ValueError(f"Target collection '{target_collection}' is already active")
+        if target_collection == self.vector_service.state_collection_name:
+            raise ValueError(f"Collection '{target_collection}' is reserved")
+
+        # A leftover from a cancelled or failed run may still hold documents deleted
+        # after its dual writes stopped, so it is dropped. Only collections this
+        # service names are dropped, anything else must not exist yet
+        collections = self.vector_service.client.get_collections()
+        target_exists = target_collection in [col.name for col in collections.collections]
+        if target_exists and not target_collection.startswith(f"{self.vector_service.base_collection_name}__"):
+            raise ValueError(f"Collection '{target_collection}' already exists")
+
+        # Claim the slot before the first await so a concurrent request is rejected
+        self._starting = True
+        try:
+            # Load the new model off the event loop, it may need to be downloaded
+            loop = asyncio.get_event_loop()
+            encoder = await loop.run_in_executor(None, lambda: SentenceTransformer(target_model))
+
+            if target_exists:
+                self.vector_service.client.delete_collection(collection_name=target_collection)
+                logger.info(f"Dropped leftover collection '{target_collection}'")
+            await self.vector_service._create_collection(target_collection, encoder)
+
+            total_points = self.vector_service.client.count(
+                collection_name=source_collection,
+                exact=True
+            ).count
+
+            self._status = {
+                "state": "running",
+                "source_collection": source_collection,
+                "target_collection": target_collection,
+                "source_model": self.vector_service.model_name,
+                "target_model": target_model,
+                "total_points": total_points,
+                "processed_points": 0,
+                "skipped_points": 0,
+                "started_at": datetime.utcnow().isoformat(),
+                "finished_at": None,
+                "error": None
+            }
+
+            # Uploads and deletes from here on also land in the target collection
+            self.vector_service.start_dual_write(target_collection, encoder)
+            
+            # Uploads already encoding only write the source collection; let them land
+            # before the scroll starts so it is guaranteed to copy their points
+            await self.vector_service.wait_for_uploads_without_shadow()
+
+            self._task = asyncio.create_task(
+                self._run_migration(
+                    source_collection,
+                    target_collection,
+                    encoder,
+                    target_model,
+                    page_size or self.scroll_page_size,
+                    batch_size or self.embed_batch_size
+                )
+            )
+
+            logger.info(
+                f"Started migration of {total_points} points from '{source_collection}' "
+                f"to '{target_collection}' using model {target_model}"
+            )
+            return self.get_status()
+
+        except Exception as e:
+            self.vector_service.stop_dual_write()
+            self._status = {"state": "idle"}
+            logger.error(f"Error starting migration: {e}")
+            raise
+
+        finally:
+            self._starting = False
+
+    async def _run_migration(
+        self,
+        source_collection: str,
+        target_collection: str,
+        encoder: SentenceTransformer,
+        target_model: str,
+        page_size: int,
+        batch_size: int
+    ):
+        """Scroll the source collection, re-embed stored content and switch over when done"""
+        client = self.vector_service.client
+        started = time.monotonic()
+        self._status["_started_monotonic"] = started
+
+        try:
+            with self.vector_service.track_deletes() as deleted:
+                # Document-level points are pooled from chunk vectors, so they are rebuilt
+                # from the re-embedded chunks instead of re-embedding their content
+                document_payloads: Dict[Tuple[str, str], Dict[str, Any]] = {}
+                
+                offset = None
+                while True:
+                    points, offset = client.scroll(
+                        collection_name=source_collection,
+                        limit=page_size,
+                        offset=offset,
+                        with_payload=True,
+                        with_vectors=False
+                    )
+
+                    chunk_points = []
+                    for point in points:
+                        if point.payload.get("point_type") == DOCUMENT_SUMMARY_POINT:
+                            document_payloads[(point.payload["user_id"], point.payload["document_id"])] = point.payload
+                            self._status["processed_points"] += 1
+                        else:
+                            chunk_points.append(point)
+
+                    for start in range(0, len(chunk_points), batch_size):
+                        batch = chunk_points[start:start + batch_size]
+                        texts = [point.payload.get("content", "") for point in batch]
+                        embeddings = await self.vector_service.encode_with(encoder, texts, batch_size=batch_size)
+
+                        # Checked right before the (blocking) upsert so a delete that
+                        # arrived while encoding cannot be resurrected
+                        new_points = [
+                            PointStruct(id=point.id, vector=embedding, payload=point.payload)
+                            for point, embedding in zip(batch, embeddings)
+                            if (point.payload.get("user_id"), point.payload.get("document_id")) not in deleted
+                        ]
+                        if new_points:
+                            client.upsert(collection_name=target_collection, points=new_points)
+
+                        self._status["processed_points"] += len(new_points)
+                        self._status["skipped_points"] += len(batch) - len(new_points)
+
+                    logger.info(
+                        f"Migration progress: {self._status['processed_points']}/{self._status['total_points']} points "
+                        f"({self._throughput():.1f} points/s)"
+                    )
+
+                    if offset is None:
+                        break
+
+                await self.vector_service.backfill_document_vectors(
+                    target_collection,
+                    payloads=document_payloads,
+                    page_size=page_size
+                )
+
+            self.vector_service.activate_collection(target_collection, encoder, target_model)
+            self._status["state"] = "completed"
+            logger.info(f"Migration to '{target_collection}' completed in {time.monotonic() - started:.1f}s")
+
+        except asyncio.CancelledError:
+            self.vector_service.stop_dual_write()
+            self._status["state"] = "cancelled"
+            logger.info(f"Migration to '{target_collection}' cancelled")
+            raise
+
+        except Exception as e:
+            self.vector_service.stop_dual_write()
+            self._status["state"] = "failed"
+            self._status["error"] = str(e)
+            logger.error(f"Migration to '{target_collection}' failed: {e}")
+
+        finally:
+            self._status["finished_at"] = datetime.utcnow().isoformat()
+            self._status["elapsed_seconds"] = time.monotonic() - started
+
+    async def cancel_migration(self) -> Dict[str, Any]:
+        """Cancel the running migration, leaving the active collection untouched"""
+        if not self.is_running():
+            raise ValueError("No migration is running")
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        return self.get_status()
+
+    def _throughput(self) -> float:
+        started = self._status.get("_started_monotonic")
+        if started is None:
+            return 0.0
+        elapsed = self._status.get("elapsed_seconds") or time.monotonic() - started
+        return self._status["processed_points"] / elapsed if elapsed > 0 else 0.0
+
+    def get_status(self) -> Dict[str, Any]:
+        """Current migration state with progress and throughput"""
+        status = {k: v for k, v in self._status.items() if not k.startswith("_")}
+        if status["state"] == "idle":
+            return status
+
+        total = status["total_points"]
+        done = status["processed_points"] + status["skipped_points"]
+        throughput = self._throughput()
+
+        status["progress"] = min(done / total, 1.0) if total else 1.0
+        status["points_per_second"] = round(throughput, 2)
+        if status["state"] == "running":
+            status["elapsed_seconds"] = time.monotonic() - self._status.get("_started_monotonic", time.monotonic())
+            status["eta_seconds"] = max(total - done, 0) / throughput if throughput > 0 else None
+
+        return status
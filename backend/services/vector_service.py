@@ -1,10 +1,12 @@
 import os
 import uuid
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import Distance, VectorParams, PointStruct
@@ -14,16 +16,41 @@ from models.schemas import SearchResult, DocumentChunk
 
 logger = logging.getLogger(__name__)
 
+# Single point in the state collection recording which collection/model is active
+ACTIVE_COLLECTION_POINT_ID = 1
+
+# Overlap of chunks stored before "overlap_words" was recorded: DocumentService
+# repeats chunk_overlap // 5 words when the previous chunk is longer than that
+LEGACY_CHUNK_OVERLAP_WORDS = 200 // 5
+
+# Payload marker for the single document-level vector stored next to a document's chunks
+DOCUMENT_SUMMARY_POINT = "document_summary"
+
 class VectorService:
     def __init__(self):
         self.qdrant_host = os.getenv("QDRANT_HOST", "localhost")
         self.qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
-        self.collection_name = "documents"
-        self.model_name = "all-MiniLM-L6-v2"  # Lightweight but effective model
+        self.base_collection_name = os.getenv("QDRANT_COLLECTION", "documents")
+        self.collection_name = self.base_collection_name
+        self.model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")  # Lightweight but effective model
+        # Records the collection/model a completed migration switched to, so it survives restarts
+        self.state_collection_name = f"{self.base_collection_name}__state"
         
         self.client: Optional[QdrantClient] = None
         self.encoder: Optional[SentenceTransformer] = None
 
+        # Collection/encoder pair that receives dual writes while a model migration is running
+        self.shadow_collection_name: Optional[str] = None
+        self.shadow_encoder: Optional[SentenceTransformer] = None
+        # Uploads that started before dual writes were enabled and so only write the active collection
+        self.uploads_without_shadow = 0
+        
+        # Sets that record (user_id, document_id) of deletes while a bulk job is running
+        self._delete_trackers: List[Set[Tuple[str, str]]] = []
+
+        # How many candidates to over-fetch per requested result for diversity selection
+        self.mmr_fetch_multiplier = int(os.getenv("MMR_FETCH_MULTIPLIER", "4"))
+
     async def initialize(self):
         """Initialize Qdrant client and sentence transformer"""
         try:
@@ -34,11 +61,14 @@ class VectorService:
                 timeout=30
             )
             
+            # Pick up the collection a previous migration switched to
+            await self._load_active_collection()
+            
             # Load sentence transformer model
             self.encoder = SentenceTransformer(self.model_name)
             
             # Create collection if it doesn't exist
-            await self._create_collection()
+            await self._create_collection(self.collection_name, self.encoder)
             
             logger.info("Vector service initialized successfully")
             
@@ -46,32 +76,93 @@ class VectorService:
             logger.error(f"Failed to initialize vector service: {e}")
             raise
 
-    async def _create_collection(self):
+    async def _create_collection(self, collection_name: str, encoder: SentenceTransformer):
         """Create Qdrant collection if it doesn't exist"""
         try:
             collections = self.client.get_collections()
             collection_names = [col.name for col in collections.collections]
             
-            if self.collection_name not in collection_names:
+            if collection_name not in collection_names:
                 # Get vector dimension from the model
-                test_embedding = self.encoder.encode(["test"])
+                test_embedding = encoder.encode(["test"])
                 vector_size = len(test_embedding[0])
                 
                 self.client.create_collection(
-                    collection_name=self.collection_name,
+                    collection_name=collection_name,
                     vectors_config=VectorParams(
                         size=vector_size,
                         distance=Distance.COSINE
                     )
                 )
-                logger.info(f"Created collection '{self.collection_name}' with vector size {vector_size}")
+                logger.info(f"Created collection '{collection_name}' with vector size {vector_size}")
             else:
-                logger.info(f"Collection '{self.collection_name}' already exists")
+                logger.info(f"Collection '{collection_name}' already exists")
+            
+            # Index the fields every search filters on
+            for field_name in ["user_id", "document_id", "point_type"]:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=models.PayloadSchemaType.KEYWORD
+                )
                 
         except Exception as e:
             logger.error(f"Error creating collection: {e}")
             raise
 
+    async def _load_active_collection(self):
+        """Restore the active collection and model recorded by the last completed migration"""
+        try:
+            collections = self.client.get_collections()
+            if self.state_collection_name not in [col.name for col in collections.collections]:
+                return
+            
+            points = self.client.retrieve(
+                collection_name=self.state_collection_name,
+                ids=[ACTIVE_COLLECTION_POINT_ID],
+                with_payload=True
+            )
+            if not points:
+                return
+            
+            state = points[0].payload
+            if state["model_name"] != self.model_name:
+                logger.warning(
+                    f"EMBEDDING_MODEL={self.model_name} is ignored, collection '{state['collection_name']}' "
+                    f"was migrated to {state['model_name']}"
+                )
+            self.collection_name = state["collection_name"]
+            self.model_name = state["model_name"]
+            logger.info(f"Using migrated collection '{self.collection_name}' with model {self.model_name}")
+            
+        except Exception as e:
+            logger.error(f"Error loading active collection: {e}")
+            raise
+
+    def _save_active_collection(self, collection_name: str, model_name: str):
+        """Persist the active collection and model in Qdrant"""
+        collections = self.client.get_collections()
+        if self.state_collection_name not in [col.name for col in collections.collections]:
+            self.client.create_collection(
+                collection_name=self.state_collection_name,
+                vectors_config=VectorParams(size=1, distance=Distance.COSINE)
+            )
+        
+        self.client.upsert(
+            collection_name=self.state_collection_name,
+            points=[
+                PointStruct(
+                    id=ACTIVE_COLLECTION_POINT_ID,
+                    vector=[1.0],
+                    payload={
+                        "collection_name": collection_name,
+                        "model_name": model_name,
+                        "activated_at": datetime.utcnow().isoformat()
+                    }
+                )
+            ]
+        )
+
     async def check_health(self) -> str:
         """Check if Qdrant is healthy"""
         try:
@@ -92,32 +183,93 @@ class VectorService:
             if not self.encoder:
                 raise Exception("Encoder not initialized")
             
-            # Run encoding in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            embeddings = await loop.run_in_executor(
-                None, 
-                lambda: self.encoder.encode(texts, convert_to_tensor=False)
-            )
-            
-            return embeddings.tolist()
+            return await self.encode_with(self.encoder, texts)
             
         except Exception as e:
             logger.error(f"Error creating embeddings: {e}")
             raise
 
+    async def encode_with(
+        self,
+        encoder: SentenceTransformer,
+        texts: List[str],
+        batch_size: int = 32
+    ) -> List[List[float]]:
+        """Encode texts with a specific encoder"""
+        # Run encoding in thread pool to avoid blocking
+        loop = asyncio.get_event_loop()
+        embeddings = await loop.run_in_executor(
+            None,
+            lambda: encoder.encode(texts, batch_size=batch_size, convert_to_tensor=False)
+        )
+        
+        return embeddings.tolist()
+
+    def start_dual_write(self, collection_name: str, encoder: SentenceTransformer):
+        """Mirror new uploads and deletes into a second collection"""
+        self.shadow_collection_name = collection_name
+        self.shadow_encoder = encoder
+        logger.info(f"Dual-writing new documents to collection '{collection_name}'")
+
+    async def wait_for_uploads_without_shadow(self, poll_interval: float = 0.05):
+        """Wait until every upload that missed the dual-write switch has stored its points"""
+        while self.uploads_without_shadow > 0:
+            await asyncio.sleep(poll_interval)
+
+    def stop_dual_write(self):
+        """Stop mirroring writes into the shadow collection"""
+        self.shadow_collection_name = None
+        self.shadow_encoder = None
+
+    @contextmanager
+    def track_deletes(self):
+        """Collect documents deleted while the block runs"""
+        deleted: Set[Tuple[str, str]] = set()
+        self._delete_trackers.append(deleted)
+        try:
+            yield deleted
+        finally:
+            self._delete_trackers.remove(deleted)
+
+    def activate_collection(
+        self,
+        collection_name: str,
+        encoder: SentenceTransformer,
+        model_name: str
+    ):
+        """Switch searches and writes over to another collection and model"""
+        # Recorded first, a restart must never fall back to the collection we are leaving
+        self._save_active_collection(collection_name, model_name)
+        
+        # Plain attribute assignments with no await in between, so no request
+        # running on the event loop can observe a half-switched service
+        self.collection_name = collection_name
+        self.encoder = encoder
+        self.model_name = model_name
+        self.stop_dual_write()
+        logger.info(f"Switched active collection to '{collection_name}' using model {model_name}")
+
     async def create_document_embeddings(
         self, 
         chunks: List[DocumentChunk], 
         document_id: str, 
-        user_id: str
+        user_id: str,
+        summary: Optional[str] = None
     ) -> Dict[str, Any]:
         """Create embeddings for document chunks and store in Qdrant"""
         try:
+            # Pin the target collections up front so a migration switching over
+            # mid-upload cannot pair vectors with the wrong model's collection
+            collection_name, encoder = self.collection_name, self.encoder
+            shadow_collection_name, shadow_encoder = self.shadow_collection_name, self.shadow_encoder
+            if not shadow_collection_name:
+                self.uploads_without_shadow += 1
+            
             # Extract text content from chunks
             texts = [chunk.content for chunk in chunks]
             
             # Create embeddings
-            embeddings = await self.create_embeddings(texts)
+            embeddings = await self.encode_with(encoder, texts)
             
             # Prepare points for Qdrant
             points = []
@@ -137,14 +289,36 @@ class VectorService:
                 )
                 points.append(point)
             
+            if chunks:
+                # Document-level vector: the mean of the chunk vectors covers the whole
+                # document, not just its opening; the summary is kept for display
+                points.append(PointStruct(
+                    id=self._document_point_id(user_id, document_id),
+                    vector=self._pooled_vector(embeddings),
+                    payload=self._document_point_payload(user_id, document_id, len(chunks), summary)
+                ))
+            
             # Store in Qdrant
             operation_info = self.client.upsert(
-                collection_name=self.collection_name,
+                collection_name=collection_name,
                 points=points
             )
             
             logger.info(f"Stored {len(points)} embeddings for document {document_id}")
             
+            if shadow_collection_name:
+                shadow_embeddings = await self.encode_with(shadow_encoder, texts)
+                if chunks:
+                    shadow_embeddings.append(self._pooled_vector(shadow_embeddings))
+                self.client.upsert(
+                    collection_name=shadow_collection_name,
+                    points=[
+                        PointStruct(id=point.id, vector=embedding, payload=point.payload)
+                        for point, embedding in zip(points, shadow_embeddings)
+                    ]
+                )
+                logger.info(f"Dual-wrote {len(points)} embeddings to collection '{shadow_collection_name}'")
+            
             return {
                 "document_id": document_id,
                 "chunks_processed": len(chunks),
@@ -154,35 +328,189 @@ class VectorService:
         except Exception as e:
             logger.error(f"Error creating document embeddings: {e}")
             raise
+        
+        finally:
+            if not shadow_collection_name:
+                self.uploads_without_shadow -= 1
+
+    @staticmethod
+    def _document_point_id(user_id: str, document_id: str) -> str:
+        """Stable id so uploads, backfills and migrations overwrite the same document-level point"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{user_id}/{document_id}"))
+
+    @staticmethod
+    def _document_point_payload(
+        user_id: str,
+        document_id: str,
+        chunk_count: int,
+        summary: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "document_id": document_id,
+            "user_id": user_id,
+            "point_type": DOCUMENT_SUMMARY_POINT,
+            "content": summary or "",
+            "chunk_count": chunk_count,
+            "created_at": datetime.utcnow().isoformat()
+        }
+
+    @staticmethod
+    def _pooled_vector(embeddings: List[List[float]]) -> List[float]:
+        """Normalized mean of a document's chunk vectors"""
+        # Qdrant stores cosine vectors normalized, normalize here too so uploads and backfills agree
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        mean = vectors.mean(axis=0)
+        return (mean / max(np.linalg.norm(mean), 1e-12)).tolist()
+
+    async def backfill_document_vectors(
+        self,
+        collection_name: Optional[str] = None,
+        payloads: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None,
+        page_size: int = 1000
+    ) -> int:
+        """Write a pooled-mean document-level point for every document that lacks one"""
+        try:
+            collection_name = collection_name or self.collection_name
+            sums: Dict[Tuple[str, str], np.ndarray] = {}
+            counts: Dict[Tuple[str, str], int] = {}
+            existing: Set[Tuple[str, str]] = set()
+            
+            with self.track_deletes() as deleted:
+                offset = None
+                while True:
+                    points, offset = self.client.scroll(
+                        collection_name=collection_name,
+                        limit=page_size,
+                        offset=offset,
+                        with_payload=["user_id", "document_id", "point_type"],
+                        with_vectors=True
+                    )
+                    
+                    for point in points:
+                        key = (point.payload["user_id"], point.payload["document_id"])
+                        if point.payload.get("point_type") == DOCUMENT_SUMMARY_POINT:
+                            existing.add(key)
+                            continue
+                        vector = np.asarray(point.vector, dtype=np.float32)
+                        if key in sums:
+                            sums[key] += vector
+                        else:
+                            sums[key] = vector
+                        counts[key] = counts.get(key, 0) + 1
+                    
+                    if offset is None:
+                        break
+                    # Let requests run between pages
+                    await asyncio.sleep(0)
+                
+                # Built and written without awaiting, so no delete can slip in between
+                # the check and the upsert and leave an orphaned document-level point
+                new_points = []
+                written = 0
+                for key, vector_sum in sums.items():
+                    if key in existing or key in deleted:
+                        continue
+                    user_id, document_id = key
+                    payload = (payloads or {}).get(key) or self._document_point_payload(user_id, document_id, counts[key])
+                    new_points.append(PointStruct(
+                        id=self._document_point_id(user_id, document_id),
+                        vector=self._pooled_vector([vector_sum / counts[key]]),
+                        payload=payload
+                    ))
+                
+                for start in range(0, len(new_points), page_size):
+                    batch = new_points[start:start + page_size]
+                    # An upload that landed during the scan may have written its own point
+                    # behind the scroll offset, and that one is built from all its chunks
+                    stored = self.client.retrieve(
+                        collection_name=collection_name,
+                        ids=[point.id for point in batch],
+                        with_payload=False,
+                        with_vectors=False
+                    )
+                    stored_ids = {str(point.id) for point in stored}
+                    batch = [point for point in batch if str(point.id) not in stored_ids]
+                    if batch:
+                        self.client.upsert(collection_name=collection_name, points=batch)
+                    written += len(batch)
+            
+            logger.info(f"Backfilled {written} document-level vectors in collection '{collection_name}'")
+            return written
+            
+        except Exception as e:
+            logger.error(f"Error backfilling document vectors: {e}")
+            raise
 
     async def search_documents(
         self, 
         query: str, 
         user_id: str, 
         limit: int = 10, 
-        score_threshold: float = 0.7
+        score_threshold: float = 0.7,
+        neighbor_window: int = 0,
+        diversify: bool = False,
+        mmr_lambda: float = 0.7,
+        duplicate_threshold: float = 0.95,
+        top_documents: Optional[int] = None
     ) -> List[SearchResult]:
         """Search for similar documents using vector similarity"""
         try:
+            collection_name, encoder = self.collection_name, self.encoder
+            
             # Create query embedding
-            query_embedding = await self.create_embeddings([query])
+            query_embedding = await self.encode_with(encoder, [query])
+            
+            chunk_filter = models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="user_id",
+                        match=models.MatchValue(value=user_id)
+                    )
+                ],
+                must_not=[
+                    models.FieldCondition(
+                        key="point_type",
+                        match=models.MatchValue(value=DOCUMENT_SUMMARY_POINT)
+                    )
+                ]
+            )
+            
+            if top_documents:
+                # Coarse pass: only search chunks of the best matching documents
+                document_ids = self._search_top_documents(
+                    collection_name, query_embedding[0], user_id, top_documents
+                )
+                if document_ids:
+                    chunk_filter.must.append(
+                        models.FieldCondition(
+                            key="document_id",
+                            match=models.MatchAny(any=document_ids)
+                        )
+                    )
+                else:
+                    logger.info("No document-level vectors found, falling back to a full chunk search")
             
             # Search in Qdrant
             search_results = self.client.search(
-                collection_name=self.collection_name,
+                collection_name=collection_name,
                 query_vector=query_embedding[0],
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="user_id",
-                            match=models.MatchValue(value=user_id)
-                        )
-                    ]
-                ),
-                limit=limit,
-                score_threshold=score_threshold
+                query_filter=chunk_filter,
+                limit=limit * self.mmr_fetch_multiplier if diversify else limit,
+                score_threshold=score_threshold,
+                with_vectors=diversify
             )
             
+            if diversify and search_results:
+                selected = self._select_diverse(
+                    np.asarray(query_embedding[0], dtype=np.float32),
+                    np.asarray([result.vector for result in search_results], dtype=np.float32),
+                    limit,
+                    mmr_lambda,
+                    duplicate_threshold
+                )
+                search_results = [search_results[i] for i in selected]
+            
             # Convert to SearchResult objects
             results = []
             for result in search_results:
@@ -198,6 +526,9 @@ class VectorService:
                 )
                 results.append(search_result)
             
+            if neighbor_window > 0 and results:
+                results = await self._expand_with_neighbors(results, search_results, collection_name, user_id, neighbor_window)
+            
             logger.info(f"Found {len(results)} results for query: {query}")
             return results
             
@@ -205,27 +536,240 @@ class VectorService:
             logger.error(f"Error searching documents: {e}")
             raise
 
-    async def delete_document(self, document_id: str, user_id: str):
-        """Delete all embeddings for a document"""
+    def _search_top_documents(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        user_id: str,
+        limit: int
+    ) -> List[str]:
+        """Return the ids of the user's documents whose document-level vectors match best"""
+        document_results = self.client.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            query_filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="user_id",
+                        match=models.MatchValue(value=user_id)
+                    ),
+                    models.FieldCondition(
+                        key="point_type",
+                        match=models.MatchValue(value=DOCUMENT_SUMMARY_POINT)
+                    )
+                ]
+            ),
+            limit=limit,
+            with_payload=["document_id"]
+        )
+        
+        return [result.payload["document_id"] for result in document_results]
+
+    @staticmethod
+    def _select_diverse(
+        query_vector: np.ndarray,
+        candidate_vectors: np.ndarray,
+        limit: int,
+        mmr_lambda: float,
+        duplicate_threshold: float
+    ) -> List[int]:
+        """Pick candidates by Maximal Marginal Relevance, dropping near-duplicates of picked ones"""
+        # Normalize once so every similarity below is a plain dot product
+        vectors = candidate_vectors / np.clip(np.linalg.norm(candidate_vectors, axis=1, keepdims=True), 1e-12, None)
+        query = query_vector / max(np.linalg.norm(query_vector), 1e-12)
+        
+        relevance = vectors @ query
+        similarity = vectors @ vectors.T
+        
+        count = len(vectors)
+        available = np.ones(count, dtype=bool)
+        max_similarity = np.full(count, -1.0, dtype=np.float32)
+        selected: List[int] = []
+        
+        while len(selected) < limit and available.any():
+            if selected:
+                scores = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+            else:
+                scores = relevance.copy()
+            scores[~available] = -np.inf
+            
+            best = int(np.argmax(scores))
+            selected.append(best)
+            
+            # Retire the pick and everything that is nearly the same text
+            available &= similarity[best] < duplicate_threshold
+            available[best] = False
+            np.maximum(max_similarity, similarity[best], out=max_similarity)
+        
+        return selected
+
+    async def _expand_with_neighbors(
+        self,
+        results: List[SearchResult],
+        search_results: List[Any],
+        collection_name: str,
+        user_id: str,
+        window: int
+    ) -> List[SearchResult]:
+        """Replace hits with the merged text of their neighboring chunks
+
+        Hits from the same document whose windows overlap or touch are merged into
+        the highest-ranked one, so no chunk is returned twice.
+        """
         try:
-            # Delete points with matching document_id and user_id
-            self.client.delete(
-                collection_name=self.collection_name,
-                points_selector=models.FilterSelector(
-                    filter=models.Filter(
+            # Chunk indices each hit needs, grouped by document
+            wanted: Dict[str, Set[int]] = {}
+            known: Dict[Tuple[str, int], Tuple[str, Optional[int]]] = {}
+            for result in search_results:
+                doc_id = result.payload["document_id"]
+                chunk_index = result.payload["chunk_index"]
+                known[(doc_id, chunk_index)] = (result.payload["content"], result.payload.get("overlap_words"))
+                wanted.setdefault(doc_id, set()).update(
+                    range(max(chunk_index - window, 0), chunk_index + window + 1)
+                )
+            
+            missing = {
+                doc_id: sorted(index for index in indices if (doc_id, index) not in known)
+                for doc_id, indices in wanted.items()
+            }
+            missing = {doc_id: indices for doc_id, indices in missing.items() if indices}
+            
+            if missing:
+                # Fetch every neighbor of every hit in a single filtered scroll
+                neighbors, _ = self.client.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=models.Filter(
                         must=[
-                            models.FieldCondition(
-                                key="document_id",
-                                match=models.MatchValue(value=document_id)
-                            ),
                             models.FieldCondition(
                                 key="user_id",
                                 match=models.MatchValue(value=user_id)
                             )
+                        ],
+                        should=[
+                            models.Filter(
+                                must=[
+                                    models.FieldCondition(
+                                        key="document_id",
+                                        match=models.MatchValue(value=doc_id)
+                                    ),
+                                    models.FieldCondition(
+                                        key="chunk_index",
+                                        match=models.MatchAny(any=indices)
+                                    )
+                                ]
+                            )
+                            for doc_id, indices in missing.items()
                         ]
+                    ),
+                    limit=sum(len(indices) for indices in missing.values()),
+                    with_payload=["document_id", "chunk_index", "content", "overlap_words"],
+                    with_vectors=False
+                )
+                for point in neighbors:
+                    known[(point.payload["document_id"], point.payload["chunk_index"])] = (
+                        point.payload["content"], point.payload.get("overlap_words")
+                    )
+            
+            # Windows per document in rank order, as [result, first index, last index, hit indices]
+            groups: List[List[Any]] = []
+            document_groups: Dict[str, List[List[Any]]] = {}
+            for result, hit in zip(results, search_results):
+                chunk_index = hit.payload["chunk_index"]
+                low, high = max(chunk_index - window, 0), chunk_index + window
+                same_document = document_groups.setdefault(result.document_id, [])
+                touching = [group for group in same_document if group[1] <= high + 1 and low <= group[2] + 1]
+                
+                if not touching:
+                    group = [result, low, high, {chunk_index}]
+                    groups.append(group)
+                    same_document.append(group)
+                    continue
+                
+                primary = touching[0]
+                primary[1] = min([low] + [group[1] for group in touching])
+                primary[2] = max([high] + [group[2] for group in touching])
+                primary[3].add(chunk_index)
+                primary[0].score = max(primary[0].score, result.score)
+                for group in touching[1:]:
+                    primary[3].update(group[3])
+                    primary[0].score = max(primary[0].score, group[0].score)
+                    same_document.remove(group)
+                    groups.remove(group)
+            
+            expanded = []
+            for result, low, high, hit_indices in groups:
+                indices = [index for index in range(low, high + 1) if (result.document_id, index) in known]
+                result.content = self._merge_chunks(
+                    [(index, *known[(result.document_id, index)]) for index in indices]
+                )
+                # Per-chunk fields would describe only the original hit, not the merged text
+                result.metadata.pop("chunk_index", None)
+                result.metadata.pop("overlap_words", None)
+                result.metadata["char_count"] = len(result.content)
+                result.metadata["word_count"] = len(result.content.split())
+                result.metadata["context_chunk_indices"] = indices
+                result.metadata["matched_chunk_indices"] = sorted(hit_indices)
+                expanded.append(result)
+            
+            return expanded
+            
+        except Exception as e:
+            logger.error(f"Error expanding search results with neighbors: {e}")
+            raise
+
+    @staticmethod
+    def _merge_chunks(chunks: List[Tuple[int, str, Optional[int]]]) -> str:
+        """Join chunks ordered by index, dropping the words consecutive chunks share"""
+        segments: List[List[str]] = []
+        previous_index = None
+        previous_length = 0
+        for chunk_index, content, overlap_words in chunks:
+            words = content.split()
+            if segments and chunk_index == previous_index + 1:
+                current = segments[-1]
+                # The chunker's overlap is known exactly, only drop it if the words really match
+                if overlap_words is None:
+                    overlap_words = LEGACY_CHUNK_OVERLAP_WORDS if previous_length > LEGACY_CHUNK_OVERLAP_WORDS else 0
+                if not (0 < overlap_words <= len(words) and current[-overlap_words:] == words[:overlap_words]):
+                    overlap_words = 0
+                current.extend(words[overlap_words:])
+            else:
+                segments.append(words)
+            previous_index = chunk_index
+            previous_length = len(words)
+        
+        return "\n\n".join(" ".join(words) for words in segments)
+
+    async def delete_document(self, document_id: str, user_id: str):
+        """Delete all embeddings for a document"""
+        try:
+            collection_names = [self.collection_name]
+            if self.shadow_collection_name:
+                collection_names.append(self.shadow_collection_name)
+            
+            # Keep running migrations and backfills from writing the document back
+            for deleted in self._delete_trackers:
+                deleted.add((user_id, document_id))
+            
+            # Delete points with matching document_id and user_id
+            for collection_name in collection_names:
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=models.FilterSelector(
+                        filter=models.Filter(
+                            must=[
+                                models.FieldCondition(
+                                    key="document_id",
+                                    match=models.MatchValue(value=document_id)
+                                ),
+                                models.FieldCondition(
+                                    key="user_id",
+                                    match=models.MatchValue(value=user_id)
+                                )
+                            ]
+                        )
                     )
                 )
-            )
             
             logger.info(f"Deleted embeddings for document {document_id}")
             
@@ -253,6 +797,8 @@ class VectorService:
             # Group by document_id
             documents = {}
             for point in response[0]:
+                if point.payload.get("point_type") == DOCUMENT_SUMMARY_POINT:
+                    continue
                 doc_id = point.payload["document_id"]
                 if doc_id not in documents:
                     documents[doc_id] = {